@@ -7,9 +7,28 @@ In the Binomial model, it is used the CRR Exact Solution approach for the calcul
 """
 
 import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+from scipy.special import ndtr
+
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:  # Numba is optional, without it the American options are priced with NumPy only
+    njit = prange = None
+
+try:
+    from _american_kernel import american_price as _american_price_c
+except ImportError:  # The C extension is optional, it is built with: python setup.py build_ext --inplace
+    _american_price_c = None
+
+_MIN_STEPS = 50  # Minimum number of steps of the American option binomial tree
+_MAX_STEPS = 1000  # Default cap on the number of steps of the American option binomial tree
 
 # Create Option class
 class Option:
+    __slots__ = ('S', 'K', 'T', 'r', 'y', 'sigma')  # Fixed attributes, no per-instance __dict__
+
     def __init__(self, S, K, T, r, y, sigma):
         self.S = S  # Current stock price
         self.K = K  # Option strike price
@@ -19,74 +38,341 @@ class Option:
         self.sigma = sigma  # Volatility of the underlying stock
 
 # European Option class taking the Option inheritance
-class EuropeanOption(Option):
+class EuropeanOption(Option, ABC):
+    __slots__ = ('_df_key', '_df_r', '_df_y')
+
+    def __init__(self, S, K, T, r, y, sigma):
+        super().__init__(S, K, T, r, y, sigma)
+        self._df_key = None  # Discount factors not computed yet
+
+    @abstractmethod
     def calculate_option_price(self):
         raise NotImplementedError("Subclasses must implement the calculate_option_price method.")
 
+    # Discount factors over the life of the option, cached with the (T, r, y) they were computed from so that repricing
+    # with another S, K or sigma (finite difference Greeks, volatility calibration) does not recompute them, while a
+    # changed T, r or y is picked up on the next pricing
+    def _discount_factors(self, T, r, y):
+        if self._df_key != (T, r, y):
+            self._df_key = (T, r, y)
+            self._df_r = math.exp(-r * T)  # Risk-free discount factor
+            self._df_y = math.exp(-y * T)  # Dividend discount factor
+        return self._df_r, self._df_y
+
 # American Option class taking the Option inheritance
-class AmericanOption(Option):
+class AmericanOption(Option, ABC):
+    __slots__ = ('max_steps',)
+
+    def __init__(self, S, K, T, r, y, sigma, max_steps=_MAX_STEPS):
+        if max_steps < _MIN_STEPS:
+            raise ValueError(f"max_steps must be at least {_MIN_STEPS}.")
+        super().__init__(S, K, T, r, y, sigma)
+        self.max_steps = max_steps  # Cap on the number of binomial steps, see _tree_parameters
+
+    @abstractmethod
     def calculate_option_price(self):
         raise NotImplementedError("Subclasses must implement the calculate_option_price method.")
 
+    # Whether the option is priced with the Black-Scholes formula instead of the binomial tree
+    def _uses_black_scholes(self):
+        return False
+
+    # Binomial tree parameters, shared by the single option pricing and the GPU batch pricing
+    def _tree_parameters(self):
+        # One step for each trading day (252 in 1 year), kept between _MIN_STEPS and max_steps (__init__ rejects a cap
+        # below the floor). The CRR price error shrinks as O(1/N) while the work grows as O(N^2), so long expirations are
+        # capped (raise max_steps for more precision), and very short expirations still get a usable tree (int(T * 252)
+        # would be 0 below one trading day)
+        num_steps = max(_MIN_STEPS, min(int(self.T * 252), self.max_steps))
+        dt = self.T / num_steps
+        u = math.exp((self.r - self.y) * dt + self.sigma * math.sqrt(dt))
+        d = 1/u  # CRR exact solution approach for up and down factors determination
+        r = math.exp((self.r - self.y) * dt)
+        p = (r - d) / (u - d)  # Risk neutral probability
+        disc = math.exp(-self.r * dt)  # One step discount factor
+        return num_steps, u, d, p, disc
+
 # European Call Option class taking the European Option inheritance
 class EuropeanCallOption(EuropeanOption):
+    __slots__ = ()
+
     def calculate_option_price(self):
-        d1 = (math.log(self.S / self.K) + (self.r - self.y + 0.5 * self.sigma**2) * self.T) / (self.sigma * math.sqrt(self.T))
-        d2 = d1 - self.sigma * math.sqrt(self.T)
-        N_d1 = 0.5 * (1 + math.erf(d1 / math.sqrt(2)))
-        N_d2 = 0.5 * (1 + math.erf(d2 / math.sqrt(2)))
+        T, r, y = self.T, self.r, self.y
+        df_r, df_y = self._discount_factors(T, r, y)
+        sigma_sqrt_T = self.sigma * math.sqrt(T)
+        d1 = (math.log(self.S / self.K) + (r - y + 0.5 * self.sigma * self.sigma) * T) / sigma_sqrt_T
+        d2 = d1 - sigma_sqrt_T
+        N_d1 = ndtr(d1)  # Standard normal cumulative distribution function, same as price_batch
+        N_d2 = ndtr(d2)
+
+        call_option_price = df_y * self.S * N_d1 -  df_r * self.K * N_d2
+        return float(call_option_price)
 
-        call_option_price = math.exp(-self.y * self.T) * self.S * N_d1 -  math.exp(-self.r * self.T) * self.K * N_d2
-        return call_option_price
+    # Price a whole chain at once: the inputs are broadcast NumPy arrays (or scalars) and an array of prices is returned
+    @staticmethod
+    def price_batch(S, K, T, r, y, sigma):
+        S, K, T, r, y, sigma = (np.asarray(a, dtype=float) for a in (S, K, T, r, y, sigma))
+        sigma_sqrt_T = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r - y + 0.5 * sigma * sigma) * T) / sigma_sqrt_T
+        d2 = d1 - sigma_sqrt_T
+        return np.exp(-y * T) * S * ndtr(d1) - np.exp(-r * T) * K * ndtr(d2)
 
 # European Put Option class taking the European Option inheritance
 class EuropeanPutOption(EuropeanOption):
+    __slots__ = ()
+
     def calculate_option_price(self):
-        d1 = (math.log(self.S / self.K) + (self.r - self.y + 0.5 * self.sigma**2) * self.T) / (self.sigma * math.sqrt(self.T))
-        d2 = d1 - self.sigma * math.sqrt(self.T)
-        N_minus_d1 = 0.5 * (1 - math.erf(d1 / math.sqrt(2)))
-        N_minus_d2 = 0.5 * (1 - math.erf(d2 / math.sqrt(2)))
+        T, r, y = self.T, self.r, self.y
+        df_r, df_y = self._discount_factors(T, r, y)
+        sigma_sqrt_T = self.sigma * math.sqrt(T)
+        d1 = (math.log(self.S / self.K) + (r - y + 0.5 * self.sigma * self.sigma) * T) / sigma_sqrt_T
+        d2 = d1 - sigma_sqrt_T
+        N_minus_d1 = ndtr(-d1)  # Standard normal cumulative distribution function, same as price_batch
+        N_minus_d2 = ndtr(-d2)
+
+        put_option_price = df_r * self.K * N_minus_d2 - df_y * self.S * N_minus_d1
+        return float(put_option_price)
+
+    # Price a whole chain at once: the inputs are broadcast NumPy arrays (or scalars) and an array of prices is returned
+    @staticmethod
+    def price_batch(S, K, T, r, y, sigma):
+        S, K, T, r, y, sigma = (np.asarray(a, dtype=float) for a in (S, K, T, r, y, sigma))
+        sigma_sqrt_T = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r - y + 0.5 * sigma * sigma) * T) / sigma_sqrt_T
+        d2 = d1 - sigma_sqrt_T
+        return np.exp(-r * T) * K * ndtr(-d2) - np.exp(-y * T) * S * ndtr(-d1)
+
+# Backward induction through the binomial tree with NumPy array operations, one array step per tree step.
+# All buffers are allocated once and updated in place: at step i only their first i + 1 entries are live.
+def _american_price_numpy(S, K, u, d, p, disc, num_steps, is_call):
+    disc_up = disc * p  # Discounted up and down probabilities, constant over the whole tree
+    disc_down = disc * (1 - p)
+
+    # Initialize stock prices and option values at expiration, S * d**num_steps * (u * u)**j as a running product
+    stock_prices = np.full(num_steps + 1, u * u)
+    stock_prices[0] = S * d**num_steps
+    np.multiply.accumulate(stock_prices, out=stock_prices)
+    values = np.empty(num_steps + 1)
+    if is_call:
+        np.subtract(stock_prices, K, out=values)
+    else:
+        np.subtract(K, stock_prices, out=values)
+    np.maximum(values, 0.0, out=values)
+    continuation = np.empty(num_steps)
+    scratch = np.empty(num_steps)
+
+    # Iterate backward through the tree to calculate option values at each step. The ufuncs are bound to locals
+    # once: the loop runs a handful of them per step, and local lookups skip the global + attribute lookup each time
+    multiply, add, subtract, maximum = np.multiply, np.add, np.subtract, np.maximum
+    for i in range(num_steps - 1, -1, -1):  # Backward approach to price the derivative (-1 step)
+        stock, cont, exercise = stock_prices[:i + 1], continuation[:i + 1], scratch[:i + 1]
+        multiply(stock, u, out=stock)  # S * u**j * d**(i - j) = S * u**j * d**(i + 1 - j) * u with d = 1/u
+
+        multiply(values[1:i + 2], disc_up, out=cont)  # Node j + 1 is the up move
+        multiply(values[:i + 1], disc_down, out=exercise)
+        add(cont, exercise, out=cont)
+
+        if is_call:
+            subtract(stock, K, out=exercise)
+        else:
+            subtract(K, stock, out=exercise)
+        maximum(exercise, cont, out=values[:i + 1])  # Branchless early exercise check, written straight into the values buffer
+
+    return float(values[0])
+
+# Same backward induction written as explicit loops over in-place buffers, compiled to native code by Numba
+def _american_price_loops(S, K, u, d, p, disc, num_steps, is_call):
+    stock_prices = np.empty(num_steps + 1)
+    values = np.empty(num_steps + 1)
+    disc_up = disc * p  # Discounted up and down probabilities, constant over the whole tree
+    disc_down = disc * (1 - p)
+
+    # Initialize stock prices and option values at expiration, S * d**num_steps * (u * u)**j as a running product
+    stock_prices[0] = S * d**num_steps
+    for j in range(1, num_steps + 1):
+        stock_prices[j] = stock_prices[j - 1] * (u * u)
+    for j in range(num_steps + 1):
+        values[j] = max(stock_prices[j] - K if is_call else K - stock_prices[j], 0.0)
+
+    # Iterate backward through the tree, index j + 1 is always read before it is overwritten
+    for i in range(num_steps - 1, -1, -1):
+        for j in range(i + 1):
+            stock_prices[j] = stock_prices[j + 1] * d
+            continuation = disc_up * values[j + 1] + disc_down * values[j]  # Node j + 1 is the up move
+            values[j] = max(stock_prices[j] - K if is_call else K - stock_prices[j], continuation)
+
+    return values[0]
 
-        put_option_price = math.exp(-self.r * self.T) * self.K * N_minus_d2 - math.exp(-self.y * self.T) * self.S * N_minus_d1
-        return put_option_price
+# Parallel version for deep trees: the nodes of each step are split across the CPU cores with prange.
+# Each step reads one buffer and writes the other (ping-pong), so the threads never race on values[j + 1]
+def _american_price_parallel_loops(S, K, u, d, p, disc, num_steps, is_call):
+    stock_prices = np.empty(num_steps + 1)
+    values = np.empty(num_steps + 1)
+    next_values = np.empty(num_steps + 1)
+    disc_up = disc * p  # Discounted up and down probabilities, constant over the whole tree
+    disc_down = disc * (1 - p)
+
+    # Initialize stock prices and option values at expiration, S * d**num_steps * (u * u)**j as a running product
+    stock_prices[0] = S * d**num_steps
+    for j in range(1, num_steps + 1):
+        stock_prices[j] = stock_prices[j - 1] * (u * u)
+    for j in prange(num_steps + 1):
+        values[j] = max(stock_prices[j] - K if is_call else K - stock_prices[j], 0.0)
+
+    # Iterate backward through the tree, the end of the outer loop body synchronizes the threads between steps
+    for i in range(num_steps - 1, -1, -1):
+        for j in prange(i + 1):
+            stock_prices[j] = stock_prices[j] * u  # Same index update: S * u**j * d**(i - j) = S * u**j * d**(i + 1 - j) * u
+            continuation = disc_up * values[j + 1] + disc_down * values[j]  # Node j + 1 is the up move
+            next_values[j] = max(stock_prices[j] - K if is_call else K - stock_prices[j], continuation)
+        values, next_values = next_values, values
+
+    return values[0]
+
+_PARALLEL_MIN_STEPS = 1000  # Below this the cost of starting the threads at every step outweighs the split work
+
+# num_steps stays a runtime argument: kernels compiled for a fixed step count (21, 63, 126, 252) measured no faster,
+# the inner loop already runs at a fraction of a nanosecond per node, and each one would add its own compilation.
+# The C extension is preferred when it has been built, then Numba, then the NumPy implementation
+if _american_price_c is not None:
+    _american_price = _american_price_c
+elif njit is not None:
+    _american_price_serial = njit(cache=True, fastmath=True)(_american_price_loops)
+    _american_price_parallel = njit(cache=True, fastmath=True, parallel=True)(_american_price_parallel_loops)
+
+    def _american_price(S, K, u, d, p, disc, num_steps, is_call):
+        if num_steps >= _PARALLEL_MIN_STEPS and get_num_threads() > 1:
+            return _american_price_parallel(S, K, u, d, p, disc, num_steps, is_call)
+        return _american_price_serial(S, K, u, d, p, disc, num_steps, is_call)
+
+    # Warm up at import so the first pricing does not pay the compilation
+    _american_price_serial(100.0, 100.0, 1.01, 1 / 1.01, 0.5, 1.0, 2, True)
+    _american_price_parallel(100.0, 100.0, 1.01, 1 / 1.01, 0.5, 1.0, 2, True)
+else:
+    _american_price = _american_price_numpy
+
+_american_price_cuda = None  # Set below when Numba finds a CUDA GPU
+
+if njit is not None:
+    from numba import cuda
+
+    if cuda.is_available():
+        # One block per option and the nodes of each step strided over the threads of the block, with a barrier between steps.
+        # The two halves of values[option] are the ping-pong buffers, src is the half holding the following step
+        @cuda.jit(fastmath=True)
+        def _american_tree_cuda_kernel(S, K, u, d, p, disc, num_steps, is_call, stock_prices, values, prices):
+            option = cuda.blockIdx.x
+            n = num_steps[option]
+            disc_up = disc[option] * p[option]  # Discounted up and down probabilities, constant over the whole tree
+            disc_down = disc[option] * (1 - p[option])
+
+            # Initialize stock prices and option values at expiration
+            for j in range(cuda.threadIdx.x, n + 1, cuda.blockDim.x):
+                stock_prices[option, j] = S[option] * u[option]**(2 * j - n)
+                values[option, 0, j] = max(stock_prices[option, j] - K[option] if is_call else K[option] - stock_prices[option, j], 0.0)
+            cuda.syncthreads()
+
+            # Iterate backward through the tree
+            src = 0
+            for i in range(n - 1, -1, -1):
+                for j in range(cuda.threadIdx.x, i + 1, cuda.blockDim.x):
+                    stock_prices[option, j] = stock_prices[option, j] * u[option]  # S * u**j * d**(i - j) = S * u**j * d**(i + 1 - j) * u
+                    continuation = disc_up * values[option, src, j + 1] + disc_down * values[option, src, j]  # Node j + 1 is the up move
+                    exercise = stock_prices[option, j] - K[option] if is_call else K[option] - stock_prices[option, j]
+                    values[option, 1 - src, j] = max(exercise, continuation)
+                src = 1 - src
+                cuda.syncthreads()
+
+            if cuda.threadIdx.x == 0:
+                prices[option] = values[option, src, 0]
+
+        _CUDA_MAX_BATCH_NODES = 2**24  # Options per launch are limited so the device buffers stay around 400 MB
+
+        # Same inputs as _american_price, but arrays with one entry per option, returns the array of prices
+        def _american_price_cuda(S, K, u, d, p, disc, num_steps, is_call):
+            prices = np.empty(len(S))
+            width = int(num_steps.max()) + 1
+            threads = min(1024, 32 * math.ceil(width / 32))  # Whole warps, at most one thread per node
+            batch = max(1, _CUDA_MAX_BATCH_NODES // width)
+            for start in range(0, len(S), batch):
+                chunk = slice(start, start + batch)
+                count = len(S[chunk])
+                stock_prices = cuda.device_array((count, width))
+                values = cuda.device_array((count, 2, width))
+                device_prices = cuda.device_array(count)
+                _american_tree_cuda_kernel[count, threads](
+                    *(cuda.to_device(np.ascontiguousarray(a[chunk])) for a in (S, K, u, d, p, disc, num_steps)),
+                    is_call, stock_prices, values, device_prices)
+                prices[chunk] = device_prices.copy_to_host()
+            return prices
 
 # American Call Option class taking the American Option inheritance
 class AmericanCallOption(AmericanOption):
-    def calculate_option_price(self):
-        num_steps = int(self.T * 252)  # One step for each trading day (252 in 1 year), taking the integer to do the for loop later
-        dt = self.T / num_steps
-        u = math.exp((self.r - self.y) * dt + self.sigma * math.sqrt(dt))
-        d = 1/u  # CRR exact solution approach for up and down factors determination
-        r = math.exp((self.r - self.y) * dt)
-        p = (r - d) / (u - d)  # Risk neutral probability
+    __slots__ = ()
+    _is_call = True
 
-        # Initialize option values at expiration
-        call_values = [max(0, self.S * u**j * d**(num_steps - j) - self.K) for j in range(num_steps + 1)]
+    # Merton: without dividends and with a non-negative rate early exercise of a call is never optimal, so it is worth
+    # the same as the European call. With a negative rate the intrinsic value can exceed the European price
+    def _uses_black_scholes(self):
+        return self.y == 0 and self.r >= 0
 
-        # Iterate backward through the tree to calculate option values at each step
-        for i in range(num_steps - 1, -1, -1):  # Backward approach to price the derivative (-1 step)
-            call_values = [max(self.S * u**j * d**(i - j) - self.K, math.exp(-self.r * dt) * (p * call_values[j] + (1 - p) * call_values[j + 1])) for j in range(i + 1)]
+    def calculate_option_price(self):
+        if self._uses_black_scholes():
+            return EuropeanCallOption(self.S, self.K, self.T, self.r, 0.0, self.sigma).calculate_option_price()
 
-        return call_values[0]
+        num_steps, u, d, p, disc = self._tree_parameters()
+        return _american_price(self.S, self.K, u, d, p, disc, num_steps, True)
 
 # American Put Option class taking the American Option inheritance
 class AmericanPutOption(AmericanOption):
+    __slots__ = ()
+    _is_call = False
+
     def calculate_option_price(self):
-        num_steps = int(self.T * 252)  # One step for each trading day (252 in 1 year), taking the integer to do the for loop later
-        dt = self.T / num_steps
-        u = math.exp((self.r - self.y) * dt + self.sigma * math.sqrt(dt))
-        d = 1/u  # CRR exact solution approach for up and down factors determination
-        r = math.exp((self.r -self.y) * dt)
-        p = (r - d) / (u - d)  # Risk neutral probability
+        num_steps, u, d, p, disc = self._tree_parameters()
+        return _american_price(self.S, self.K, u, d, p, disc, num_steps, False)
+
+# Plain pricing functions for library use: inputs are scalars or NumPy arrays broadcast against each other
+def price_european_call(S, K, T, r, y, sigma):
+    return EuropeanCallOption.price_batch(S, K, T, r, y, sigma)
+
+def price_european_put(S, K, T, r, y, sigma):
+    return EuropeanPutOption.price_batch(S, K, T, r, y, sigma)
 
-        # Initialize option values at expiration
-        put_values = [max(0, self.K - self.S * u**j * d**(num_steps - j)) for j in range(num_steps + 1)]
+def price_american_call(S, K, T, r, y, sigma, max_steps=_MAX_STEPS):
+    return _price_american_batch(AmericanCallOption, S, K, T, r, y, sigma, max_steps)
 
-        # Iterate backward through the tree to calculate option values at each step
-        for i in range(num_steps - 1, -1, -1):  # Backwards approach to price the derivative (-1 step)
-            put_values = [max(self.K - self.S * u**j * d**(i - j), math.exp(-self.r * dt) * (p * put_values[j] + (1 - p) * put_values[j + 1])) for j in range(i + 1)]
+def price_american_put(S, K, T, r, y, sigma, max_steps=_MAX_STEPS):
+    return _price_american_batch(AmericanPutOption, S, K, T, r, y, sigma, max_steps)
+
+_CUDA_MIN_BATCH = 64  # Smaller batches are priced on the CPU, they do not fill enough of the GPU to pay for the transfers
+
+# Every American option needs its own tree: the broadcast inputs are priced one contract at a time on the CPU,
+# or all together on the GPU (one block per contract) when a CUDA device is available and the batch is large enough
+def _price_american_batch(option_class, S, K, T, r, y, sigma, max_steps):
+    params = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, r, y, sigma)))
+    options = [option_class(*(float(a[index]) for a in params), max_steps) for index in np.ndindex(params[0].shape)]
+    if _american_price_cuda is not None and len(options) >= _CUDA_MIN_BATCH:
+        prices = _price_american_options_cuda(options)
+    else:
+        prices = np.array([option.calculate_option_price() for option in options])
+    return prices.reshape(params[0].shape)[()]
+
+def _price_american_options_cuda(options):
+    prices = np.empty(len(options))
+    tree_options = []
+    for index, option in enumerate(options):
+        if option._uses_black_scholes():  # No tree needed
+            prices[index] = option.calculate_option_price()
+        else:
+            tree_options.append(index)
 
-        return put_values[0]
+    if tree_options:
+        S = np.array([options[index].S for index in tree_options])
+        K = np.array([options[index].K for index in tree_options])
+        num_steps, u, d, p, disc = (np.array(a) for a in zip(*(options[index]._tree_parameters() for index in tree_options)))
+        prices[tree_options] = _american_price_cuda(S, K, u, d, p, disc, num_steps, options[0]._is_call)
+    return prices
 
 # User input function to ask for the values
 def get_user_input():
@@ -0,0 +1,67 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Optional C implementation of the American option binomial tree backward induction.
+Build it in place with: python setup.py build_ext --inplace
+"""
+
+cimport openmp
+from cython.parallel cimport prange
+from libc.stdlib cimport free, malloc
+
+cdef enum:
+    PARALLEL_MIN_STEPS = 1000  # Below this the cost of starting the OpenMP threads at every step outweighs the split work
+
+# Backward induction over caller provided buffers of num_steps + 1 doubles. In the parallel case each step reads one
+# value buffer and writes the other (ping-pong), so the threads never race on values[j + 1]
+cdef double _backward_induction(double S, double K, double u, double d, double p, double disc, int num_steps,
+                                bint is_call, double* stock_prices, double* values, double* next_values) noexcept nogil:
+    cdef double disc_up = disc * p  # Discounted up and down probabilities, constant over the whole tree
+    cdef double disc_down = disc * (1 - p)
+    cdef double continuation, exercise
+    cdef double* swap
+    cdef int i, j
+
+    # Initialize stock prices and option values at expiration, S * d**num_steps * (u * u)**j as a running product
+    stock_prices[0] = S * d**num_steps
+    for j in range(1, num_steps + 1):
+        stock_prices[j] = stock_prices[j - 1] * (u * u)
+    for j in range(num_steps + 1):
+        exercise = stock_prices[j] - K if is_call else K - stock_prices[j]
+        values[j] = exercise if exercise > 0.0 else 0.0
+
+    # Small trees (or a single thread): serial in place update, index j + 1 is always read before it is overwritten
+    if num_steps < PARALLEL_MIN_STEPS or openmp.omp_get_max_threads() < 2:
+        for i in range(num_steps - 1, -1, -1):
+            for j in range(i + 1):
+                stock_prices[j] = stock_prices[j] * u  # Same index update: S * u**j * d**(i - j) = S * u**j * d**(i + 1 - j) * u
+                continuation = disc_up * values[j + 1] + disc_down * values[j]  # Node j + 1 is the up move
+                exercise = stock_prices[j] - K if is_call else K - stock_prices[j]
+                values[j] = exercise if exercise > continuation else continuation
+        return values[0]
+
+    # Deep trees: the nodes of each step are split across threads, the end of each parallel step synchronizes them
+    for i in range(num_steps - 1, -1, -1):
+        for j in prange(i + 1, schedule='static'):
+            stock_prices[j] = stock_prices[j] * u
+            continuation = disc_up * values[j + 1] + disc_down * values[j]
+            exercise = stock_prices[j] - K if is_call else K - stock_prices[j]
+            next_values[j] = exercise if exercise > continuation else continuation
+        swap = values
+        values = next_values
+        next_values = swap
+
+    return values[0]
+
+# Same signature as the Numba and NumPy implementations in Option_Pricing_Program
+def american_price(double S, double K, double u, double d, double p, double disc, int num_steps, bint is_call):
+    cdef double* buffer = <double*> malloc(3 * (num_steps + 1) * sizeof(double))
+    cdef double price
+    if buffer == NULL:
+        raise MemoryError()
+    try:
+        with nogil:
+            price = _backward_induction(S, K, u, d, p, disc, num_steps, is_call,
+                                        buffer, buffer + num_steps + 1, buffer + 2 * (num_steps + 1))
+    finally:
+        free(buffer)
+    return price
@@ -0,0 +1,19 @@
+"""
+Build script for the optional C extension of the American option binomial tree.
+Usage: python setup.py build_ext --inplace
+"""
+
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+extension = Extension(
+    "_american_kernel",
+    ["_american_kernel.pyx"],
+    extra_compile_args=["-O3", "-march=native", "-ffast-math", "-fopenmp"],
+    extra_link_args=["-fopenmp"],
+)
+
+setup(
+    name="option-pricing-program",
+    ext_modules=cythonize([extension]),
+)